@@ -0,0 +1,264 @@
+"""
+Benchmark suite for the sth/robert_common processing library.
+Generates synthetic record sets and measures throughput, latency percentiles
+and peak memory for the APIs other teams depend on.
+
+Run from the repository root:
+    python -m benchmarks.bench_robert_common --output bench_new.json
+    python -m benchmarks.bench_robert_common --output bench_new.json --compare bench_old.json
+"""
+
+import argparse
+import json
+import logging
+import random
+import string
+import subprocess
+import time
+import tracemalloc
+from datetime import datetime
+from typing import Any, Callable, Dict, List, Optional
+
+from sth.robert_common.advanced_processing import (
+    AdvancedDataProcessor,
+    batch_process_data,
+    data_export_helper,
+)
+from sth.robert_common.data_processor import process_data
+from sth.robert_common.extended_utils import EnhancedLogger
+
+
+def _random_string(rng: random.Random, length: int) -> str:
+    return ''.join(rng.choices(string.ascii_letters + string.digits + ' ', k=length))
+
+
+def _random_value(rng: random.Random, depth: int, width: int, null_ratio: float, string_length: int) -> Any:
+    """Build a single field value, recursing into nested dicts while depth remains."""
+    if rng.random() < null_ratio:
+        return None
+    if depth > 0 and rng.random() < 0.3:
+        return {
+            f"nested_{i}": _random_value(rng, depth - 1, max(1, width // 2), null_ratio, string_length)
+            for i in range(max(1, width // 2))
+        }
+    kind = rng.randrange(3)
+    if kind == 0:
+        return _random_string(rng, string_length)
+    if kind == 1:
+        return rng.randint(0, 1_000_000)
+    return rng.random()
+
+
+def generate_records(count: int, width: int = 10, nesting: int = 0, null_ratio: float = 0.1,
+                     string_length: int = 16, seed: int = 42) -> List[Dict[str, Any]]:
+    """
+    Generate a reproducible record set.
+    Every record carries an 'id' plus `width` fields; `nesting` controls how deep
+    nested dicts may go and `null_ratio` the share of fields left as None.
+    """
+    rng = random.Random(seed)
+    records = []
+    for record_id in range(count):
+        record = {'id': record_id}
+        for i in range(width):
+            record[f"field_{i}"] = _random_value(rng, nesting, width, null_ratio, string_length)
+        records.append(record)
+    return records
+
+
+def _percentile(sorted_values: List[float], pct: float) -> float:
+    if not sorted_values:
+        return 0.0
+    index = min(len(sorted_values) - 1, int(round(pct / 100.0 * (len(sorted_values) - 1))))
+    return sorted_values[index]
+
+
+def measure(name: str, func: Callable[[Any], Any], inputs: List[Any],
+            item_count: Optional[Callable[[Any], int]] = None, repeat: int = 3) -> Dict[str, Any]:
+    """
+    Call `func` once per input and report throughput, latency percentiles and peak memory.
+    `item_count` gives the number of records an input holds (default 1), so batched
+    benchmarks report throughput in records rather than calls.
+    After a warmup pass the inputs are timed `repeat` times and the fastest run is kept.
+    Peak memory comes from a separate tracemalloc pass so tracing overhead does not skew timings.
+    """
+    for item in inputs[:10]:
+        func(item)
+
+    latencies, total_seconds = [], float('inf')
+    for _ in range(max(1, repeat)):
+        run_latencies = []
+        start = time.perf_counter()
+        for item in inputs:
+            call_start = time.perf_counter()
+            func(item)
+            run_latencies.append(time.perf_counter() - call_start)
+        run_seconds = time.perf_counter() - start
+        if run_seconds < total_seconds:
+            latencies, total_seconds = run_latencies, run_seconds
+
+    tracemalloc.start()
+    for item in inputs:
+        func(item)
+    _, peak_bytes = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    latencies.sort()
+    total_items = sum(item_count(item) for item in inputs) if item_count else len(inputs)
+    return {
+        'name': name,
+        'calls': len(inputs),
+        'items': total_items,
+        'total_seconds': total_seconds,
+        'throughput_items_per_sec': total_items / total_seconds if total_seconds > 0 else 0.0,
+        'latency_ms': {
+            'p50': _percentile(latencies, 50) * 1000,
+            'p90': _percentile(latencies, 90) * 1000,
+            'p99': _percentile(latencies, 99) * 1000,
+            'max': latencies[-1] * 1000 if latencies else 0.0,
+        },
+        'peak_memory_bytes': peak_bytes,
+    }
+
+
+def run_benchmarks(records: List[Dict[str, Any]], batch_size: int, repeat: int = 3) -> List[Dict[str, Any]]:
+    """Run every benchmark against the same record set."""
+    processor = AdvancedDataProcessor("benchmark_team")
+    processed = [processor.process_with_validation(record) for record in records]
+    batches = [records[i:i + batch_size] for i in range(0, len(records), batch_size)]
+    batch_results = [batch_process_data(batch, "benchmark_team") for batch in batches]
+
+    # Keep the logger quiet so we measure formatting, not terminal I/O
+    enhanced_logger = EnhancedLogger("benchmark", team="benchmark_team")
+    enhanced_logger.logger.addHandler(logging.NullHandler())
+    enhanced_logger.logger.setLevel(logging.INFO)
+    enhanced_logger.logger.propagate = False
+
+    def process_one(record):
+        # Use a fresh processor per run so the audit trail does not grow unbounded
+        return AdvancedDataProcessor("benchmark_team").process_with_validation(record)
+
+    return [
+        measure('process_with_validation', process_one, records, repeat=repeat),
+        measure('batch_process_data', lambda batch: batch_process_data(batch, "benchmark_team"),
+                batches, item_count=len, repeat=repeat),
+        measure('data_export_helper.json', data_export_helper, processed, repeat=repeat),
+        measure('data_export_helper.csv', lambda result: data_export_helper(result, "csv"),
+                batch_results, item_count=lambda result: result['summary']['total_processed'],
+                repeat=repeat),
+        measure('EnhancedLogger.info_with_context',
+                lambda record: enhanced_logger.info_with_context("benchmark record", **record),
+                records, repeat=repeat),
+        measure('data_processor.process_data', process_data, records, repeat=repeat),
+    ]
+
+
+def get_commit_hash() -> str:
+    try:
+        return subprocess.run(['git', 'rev-parse', 'HEAD'],
+                              capture_output=True, text=True, check=True).stdout.strip()
+    except (subprocess.CalledProcessError, FileNotFoundError):
+        return "unknown"
+
+
+def compare_results(baseline: Dict[str, Any], current: Dict[str, Any], threshold: float) -> List[str]:
+    """
+    Compare two result documents and return a list of regressions.
+    A benchmark regresses when throughput drops, or p50 latency or peak memory grows,
+    by more than `threshold` (a fraction, e.g. 0.1 for 10%).
+    """
+    regressions = []
+    baseline_by_name = {result['name']: result for result in baseline.get('results', [])}
+
+    for result in current.get('results', []):
+        old = baseline_by_name.get(result['name'])
+        if not old:
+            continue
+
+        checks = [
+            ('throughput', old['throughput_items_per_sec'], result['throughput_items_per_sec'], False),
+            ('p50 latency', old['latency_ms']['p50'], result['latency_ms']['p50'], True),
+            ('peak memory', old['peak_memory_bytes'], result['peak_memory_bytes'], True),
+        ]
+        for metric, old_value, new_value, higher_is_worse in checks:
+            if not old_value:
+                continue
+            change = (new_value - old_value) / old_value
+            if (higher_is_worse and change > threshold) or (not higher_is_worse and -change > threshold):
+                regressions.append(f"{result['name']}: {metric} changed {change:+.1%} "
+                                   f"({old_value:.4g} -> {new_value:.4g})")
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark the sth/robert_common processing library')
+    parser.add_argument('--records', type=int, default=1000, help='Number of records to generate')
+    parser.add_argument('--width', type=int, default=10, help='Fields per record')
+    parser.add_argument('--nesting', type=int, default=1, help='Maximum depth of nested dict fields')
+    parser.add_argument('--null_ratio', type=float, default=0.1, help='Share of fields set to None')
+    parser.add_argument('--string_length', type=int, default=16, help='Length of generated string values')
+    parser.add_argument('--batch_size', type=int, default=100, help='Records per batch_process_data call')
+    parser.add_argument('--repeat', type=int, default=3, help='Timed runs per benchmark; the fastest is kept')
+    parser.add_argument('--seed', type=int, default=42, help='Random seed for record generation')
+    parser.add_argument('--output', help='JSON file to store benchmark results')
+    parser.add_argument('--compare', help='Baseline JSON results file to compare against')
+    parser.add_argument('--threshold', type=float, default=0.1,
+                        help='Allowed regression as a fraction before failing (default: 0.1)')
+
+    args = parser.parse_args()
+    if args.batch_size <= 0:
+        parser.error('--batch_size must be positive')
+
+    # Read the baseline before anything is written, so --output may point at the same file
+    baseline = None
+    if args.compare:
+        with open(args.compare, 'r', encoding='utf-8') as f:
+            baseline = json.load(f)
+
+    records = generate_records(args.records, args.width, args.nesting, args.null_ratio,
+                               args.string_length, args.seed)
+    results = run_benchmarks(records, args.batch_size, args.repeat)
+
+    report = {
+        'timestamp': datetime.now().isoformat(),
+        'commit': get_commit_hash(),
+        'parameters': {
+            'records': args.records,
+            'width': args.width,
+            'nesting': args.nesting,
+            'null_ratio': args.null_ratio,
+            'string_length': args.string_length,
+            'batch_size': args.batch_size,
+            'repeat': args.repeat,
+            'seed': args.seed,
+        },
+        'results': results,
+    }
+
+    for result in results:
+        latency = result['latency_ms']
+        print(f"{result['name']:<36} {result['throughput_items_per_sec']:>12.1f} items/s  "
+              f"p50={latency['p50']:.3f}ms p99={latency['p99']:.3f}ms  "
+              f"peak={result['peak_memory_bytes'] / 1024:.1f}KiB")
+
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump(report, f, indent=2)
+        print(f"Saved benchmark results to {args.output}")
+
+    if args.compare:
+        if baseline.get('parameters') != report['parameters']:
+            print("Warning: baseline was recorded with different parameters")
+        regressions = compare_results(baseline, report, args.threshold)
+        if regressions:
+            print(f"Detected {len(regressions)} regressions over {args.threshold:.0%} threshold:")
+            for regression in regressions:
+                print(f"  - {regression}")
+            return 1
+        print(f"No regressions over {args.threshold:.0%} threshold")
+
+    return 0
+
+
+if __name__ == "__main__":
+    exit(main())
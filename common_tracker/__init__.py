@@ -0,0 +1,4 @@
+"""
+Common code usage tracker.
+Run it as `python common_tracker/track_imports.py` or `python -m common_tracker.track_imports`.
+"""
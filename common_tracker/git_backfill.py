@@ -0,0 +1,227 @@
+"""
+Historical usage backfill for the common code tracker.
+Computes usage snapshots for the last N commits straight from git objects,
+without checking anything out. Blobs are read through persistent
+`git cat-file --batch` processes and parsed once per blob SHA, so files that
+did not change between commits are never re-parsed.
+"""
+
+import json
+import os
+import subprocess
+from multiprocessing import Pool
+
+if __package__:
+    from .track_imports import (
+        analyze_imports_in_source,
+        filter_common_imports,
+        is_within_directory,
+        module_prefixes,
+    )
+else:
+    from track_imports import (
+        analyze_imports_in_source,
+        filter_common_imports,
+        is_within_directory,
+        module_prefixes,
+    )
+
+# Number of blob SHAs handed to a worker at a time
+BLOB_CHUNK_SIZE = 64
+
+# Bump whenever analyze_imports_in_source or IMPORT_PATTERNS change what a parse
+# produces; caches written under another version are discarded.
+BLOB_CACHE_VERSION = 1
+
+
+class GitBlobReader:
+    """
+    Reads blob contents through one long-lived `git cat-file --batch` process
+    instead of spawning git for every file.
+    """
+
+    def __init__(self, repo_dir='.'):
+        self.process = subprocess.Popen(['git', 'cat-file', '--batch'], cwd=repo_dir,
+                                        stdin=subprocess.PIPE, stdout=subprocess.PIPE)
+
+    def read(self, sha):
+        """Return the raw blob bytes for sha, or None if git does not have it."""
+        self.process.stdin.write(sha.encode() + b'\n')
+        self.process.stdin.flush()
+
+        # Header is "<sha> <type> <size>" or "<sha> missing"
+        header = self.process.stdout.readline().split()
+        if len(header) != 3:
+            return None
+        data = self.process.stdout.read(int(header[2]))
+        self.process.stdout.read(1)  # trailing newline after the content
+        return data
+
+    def close(self):
+        if self.process.poll() is None:
+            self.process.stdin.close()
+            self.process.wait()
+
+
+# Per-worker reader, started by _init_worker so each process keeps one cat-file alive
+_worker_reader = None
+
+def _init_worker(repo_dir):
+    global _worker_reader
+    _worker_reader = GitBlobReader(repo_dir)
+
+def _parse_blobs(shas, reader=None):
+    """Parse the imports of every blob in shas. Returns {sha: imports}."""
+    reader = reader or _worker_reader
+    parsed = {}
+    for sha in shas:
+        data = reader.read(sha)
+        if data is None:
+            print(f"Warning: Could not read blob {sha}")
+            parsed[sha] = []
+            continue
+        parsed[sha] = analyze_imports_in_source(data.decode('utf-8', errors='replace'))
+    return parsed
+
+
+def list_commits(count, repo_dir='.'):
+    """Return (hash, author, date) for the last count first-parent commits, oldest first."""
+    if count <= 0:
+        # git log treats a negative --max-count as unlimited
+        raise ValueError(f"commit count must be positive, got {count}")
+    cmd = ['git', 'log', '--first-parent', f'--max-count={count}', '--format=%H%x00%an%x00%ci']
+    try:
+        result = subprocess.run(cmd, cwd=repo_dir, capture_output=True, text=True, check=True)
+    except subprocess.CalledProcessError:
+        print("Warning: Could not list commits for backfill")
+        return []
+    commits = [tuple(line.split('\0')) for line in result.stdout.strip().split('\n') if line]
+    return list(reversed(commits))
+
+def list_python_blobs(commit, repo_dir='.'):
+    """Return {path: blob_sha} for every Python file in a commit's tree."""
+    cmd = ['git', 'ls-tree', '-r', '-z', '--full-tree', commit]
+    try:
+        result = subprocess.run(cmd, cwd=repo_dir, capture_output=True, text=True, check=True)
+    except subprocess.CalledProcessError:
+        print(f"Warning: Could not list tree for {commit}")
+        return {}
+
+    blobs = {}
+    for entry in result.stdout.split('\0'):
+        if not entry:
+            continue
+        # "<mode> <type> <sha>\t<path>"
+        meta, path = entry.split('\t', 1)
+        _, obj_type, sha = meta.split()
+        if obj_type == 'blob' and path.endswith('.py'):
+            blobs[path] = sha
+    return blobs
+
+
+def load_blob_cache(cache_file):
+    """Load parse results keyed by blob SHA from a previous backfill."""
+    if cache_file and os.path.exists(cache_file):
+        try:
+            with open(cache_file, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+            if isinstance(data, dict) and data.get('version') == BLOB_CACHE_VERSION:
+                return data.get('blobs', {})
+            print(f"Discarding blob cache {cache_file} written by a different parser version")
+        except Exception as e:
+            print(f"Warning: Could not load blob cache: {e}")
+    return {}
+
+def save_blob_cache(cache_file, cache):
+    if not cache_file:
+        return
+    try:
+        with open(cache_file, 'w', encoding='utf-8') as f:
+            json.dump({'version': BLOB_CACHE_VERSION, 'blobs': cache}, f, separators=(',', ':'))
+    except Exception as e:
+        print(f"Warning: Could not save blob cache: {e}")
+
+
+def parse_blobs(shas, repo_dir='.', workers=None, cache=None):
+    """
+    Parse every blob in shas, skipping those already in cache.
+    Work is spread over worker processes, each holding its own cat-file process.
+    Returns the cache updated with the new results.
+    """
+    cache = cache if cache is not None else {}
+    pending = sorted(sha for sha in set(shas) if sha not in cache)
+    if not pending:
+        return cache
+
+    if workers is not None and workers <= 0:
+        raise ValueError(f"workers must be positive, got {workers}")
+    workers = workers or os.cpu_count() or 1
+    chunks = [pending[i:i + BLOB_CHUNK_SIZE] for i in range(0, len(pending), BLOB_CHUNK_SIZE)]
+
+    if workers == 1 or len(chunks) == 1:
+        reader = GitBlobReader(repo_dir)
+        try:
+            for chunk in chunks:
+                cache.update(_parse_blobs(chunk, reader))
+        finally:
+            reader.close()
+        return cache
+
+    with Pool(min(workers, len(chunks)), initializer=_init_worker, initargs=(repo_dir,)) as pool:
+        for parsed in pool.imap_unordered(_parse_blobs, chunks):
+            cache.update(parsed)
+    return cache
+
+
+def build_snapshot(commit_info, blobs, parsed, common_dir, prefixes):
+    """Summarize usage of one common directory at one commit."""
+    commit_hash, commit_author, commit_date = commit_info
+    common_files = []
+    usage_by_file = {}
+
+    for path, sha in blobs.items():
+        if is_within_directory(path, common_dir):
+            common_files.append(os.path.relpath(path, common_dir))
+            continue
+        common_imports = filter_common_imports(parsed[sha], prefixes)
+        if common_imports:
+            usage_by_file[f"./{path}"] = len(common_imports)
+
+    return {
+        'commit_info': {
+            'hash': commit_hash,
+            'author': commit_author,
+            'date': commit_date
+        },
+        'total_common_files': len(common_files),
+        'common_files': sorted(common_files),
+        'total_files_using_common': len(usage_by_file),
+        'usage_by_file': dict(sorted(usage_by_file.items()))
+    }
+
+
+def backfill_usage_history(common_dirs, commit_count, repo_dir='.', workers=None, cache_file=None):
+    """
+    Compute usage snapshots for the last commit_count commits.
+    Returns {common_dir: [snapshot, ...]} with snapshots ordered oldest first.
+    """
+    commits = list_commits(commit_count, repo_dir)
+    print(f"Backfilling usage history over {len(commits)} commits")
+
+    trees = [list_python_blobs(commit[0], repo_dir) for commit in commits]
+    all_shas = {sha for blobs in trees for sha in blobs.values()}
+
+    cache = load_blob_cache(cache_file)
+    cached_before = sum(1 for sha in all_shas if sha in cache)
+    parsed = parse_blobs(all_shas, repo_dir, workers, cache)
+    print(f"Parsed {len(all_shas) - cached_before} unique blobs ({cached_before} reused from cache)")
+    save_blob_cache(cache_file, parsed)
+
+    prefixes = {common_dir: module_prefixes(common_dir) for common_dir in common_dirs}
+    history = {common_dir: [] for common_dir in common_dirs}
+    for commit_info, blobs in zip(commits, trees):
+        for common_dir in common_dirs:
+            history[common_dir].append(
+                build_snapshot(commit_info, blobs, parsed, common_dir, prefixes[common_dir])
+            )
+    return history
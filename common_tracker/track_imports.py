@@ -1,10 +1,55 @@
+import time
+_MODULE_LOAD_START = time.perf_counter()
+
 import subprocess
 import argparse
-import yaml
+import importlib
 import os
 import re
+import sys
 from datetime import datetime
-from pathlib import Path
+
+# yaml, json, glob and the backfill/watch modules are only needed on some paths,
+# so they are imported on first use through _lazy_import to keep CI cold starts short.
+_IMPORT_TIMINGS = {'eager imports': time.perf_counter() - _MODULE_LOAD_START}
+
+# Run as a script (or re-run as __mp_main__ by multiprocessing), register this module
+# under its import name so sibling modules share it instead of loading a second copy.
+if __name__ in ('__main__', '__mp_main__'):
+    sys.modules.setdefault(f'{__package__}.track_imports' if __package__ else 'track_imports',
+                           sys.modules[__name__])
+
+def _sibling_module(name):
+    """Import name of a sibling module, whether run as a script or as the common_tracker package."""
+    return f'{__package__}.{name}' if __package__ else name
+
+def _lazy_import(name):
+    """Import a module on first use, recording how long the import took."""
+    module = sys.modules.get(name)
+    if module is not None:
+        return module
+    start = time.perf_counter()
+    module = importlib.import_module(name)
+    _IMPORT_TIMINGS[f'import {name}'] = time.perf_counter() - start
+    return module
+
+def _load_yaml(stream):
+    """Safe-load YAML, using the libyaml C loader when it is available."""
+    yaml = _lazy_import('yaml')
+    return yaml.load(stream, Loader=getattr(yaml, 'CSafeLoader', yaml.SafeLoader))
+
+def _dump_yaml(data, stream):
+    """Dump YAML in the tracking file layout, using the libyaml C dumper when it is available."""
+    yaml = _lazy_import('yaml')
+    yaml.dump(data, stream, Dumper=getattr(yaml, 'CSafeDumper', yaml.SafeDumper),
+              default_flow_style=False, sort_keys=False, indent=2)
+
+def print_startup_profile():
+    """Report where startup time went: eager imports, each lazy import and total runtime."""
+    print("Startup profile:")
+    for label, seconds in _IMPORT_TIMINGS.items():
+        print(f"  {label:<36} {seconds * 1000:8.2f} ms")
+    print(f"  {'total since module load':<36} {(time.perf_counter() - _MODULE_LOAD_START) * 1000:8.2f} ms")
 
 def get_git_info():
     """Get current git commit hash and author info."""
@@ -23,125 +68,182 @@ def get_changed_files(common_dir, since_commit='HEAD~1'):
     """
     Returns a list of files changed in the common directory since the specified commit.
     """
-    cmd = ['git', 'diff', '--name-only', since_commit, 'HEAD', '--', common_dir]
+    return get_changed_files_by_dir([common_dir], since_commit)[common_dir]
+
+def get_changed_files_by_dir(common_dirs, since_commit='HEAD~1'):
+    """
+    Returns changed files for several common directories using a single git diff.
+    """
+    changed_by_dir = {common_dir: [] for common_dir in common_dirs}
+    cmd = ['git', 'diff', '--name-only', since_commit, 'HEAD', '--'] + list(common_dirs)
     try:
         result = subprocess.run(cmd, capture_output=True, text=True, check=True)
-        changed_files = [line for line in result.stdout.strip().split('\n') if line]
-        return changed_files
     except subprocess.CalledProcessError:
-        print(f"Warning: Could not get git diff for {common_dir}")
-        return []
+        print(f"Warning: Could not get git diff for {', '.join(common_dirs)}")
+        return changed_by_dir
+
+    for line in result.stdout.strip().split('\n'):
+        if not line:
+            continue
+        for common_dir in common_dirs:
+            if is_within_directory(line, common_dir):
+                changed_by_dir[common_dir].append(line)
+    return changed_by_dir
+
+def is_within_directory(path, directory):
+    """Check whether a repo-relative path lies inside directory."""
+    path = os.path.normpath(path)
+    directory = os.path.normpath(directory)
+    return path == directory or path.startswith(directory + os.sep)
+
+# Compiled once; every file in the repo goes through these
+IMPORT_PATTERNS = [
+    ('from_import', re.compile(r'^from\s+([^\s]+)\s+import\s+(.+)$')),  # from module import something
+    ('import', re.compile(r'^import\s+([^\s]+)$'))                        # import module
+]
+
+def analyze_imports_in_source(content):
+    """
+    Analyze Python imports in source text and return structured information.
+    """
+    imports = []
+
+    # Find import statements
+    for line_num, line in enumerate(content.split('\n'), 1):
+        line = line.strip()
+        if not line.startswith(('from', 'import')):
+            continue
+        for import_type, pattern in IMPORT_PATTERNS:
+            match = pattern.match(line)
+            if match:
+                if import_type == 'from_import':
+                    module = match.group(1)
+                    items = [item.strip() for item in match.group(2).split(',')]
+                    imports.append({
+                        'type': 'from_import',
+                        'module': module,
+                        'items': items,
+                        'line': line_num,
+                        'raw_line': line
+                    })
+                else:
+                    module = match.group(1)
+                    imports.append({
+                        'type': 'import',
+                        'module': module,
+                        'line': line_num,
+                        'raw_line': line
+                    })
+
+    return imports
 
 def analyze_imports_in_file(file_path):
     """
     Analyze Python imports in a file and return structured information.
     """
-    imports = []
     try:
         with open(file_path, 'r', encoding='utf-8') as f:
-            content = f.read()
-            
-        # Find import statements
-        import_patterns = [
-            r'^from\s+([^\s]+)\s+import\s+(.+)$',  # from module import something
-            r'^import\s+([^\s]+)$'                  # import module
-        ]
-        
-        for line_num, line in enumerate(content.split('\n'), 1):
-            line = line.strip()
-            for pattern in import_patterns:
-                match = re.match(pattern, line)
-                if match:
-                    if 'from' in pattern:
-                        module = match.group(1)
-                        items = [item.strip() for item in match.group(2).split(',')]
-                        imports.append({
-                            'type': 'from_import',
-                            'module': module,
-                            'items': items,
-                            'line': line_num,
-                            'raw_line': line
-                        })
-                    else:
-                        module = match.group(1)
-                        imports.append({
-                            'type': 'import',
-                            'module': module,
-                            'line': line_num,
-                            'raw_line': line
-                        })
+            return analyze_imports_in_source(f.read())
     except Exception as e:
         print(f"Warning: Could not analyze {file_path}: {e}")
     
-    return imports
+    return []
 
 def scan_common_directory(common_dir):
     """
     Scan the common directory for Python files and analyze their structure.
     """
-    common_files = {}
-    common_path = Path(common_dir)
-    
-    if not common_path.exists():
-        print(f"Warning: Common directory {common_dir} does not exist")
-        return common_files
-    
-    for python_file in common_path.rglob("*.py"):
-        relative_path = str(python_file.relative_to(common_path))
-        imports = analyze_imports_in_file(python_file)
-        
-        common_files[relative_path] = {
-            'full_path': str(python_file),
-            'size_bytes': python_file.stat().st_size,
-            'imports': imports,
-            'last_modified': datetime.fromtimestamp(python_file.stat().st_mtime).isoformat()
-        }
-    
-    return common_files
+    return scan_repository([common_dir], include_usage=False)[common_dir][0]
 
 def find_usage_across_codebase(common_dir):
     """
     Search for usage of common modules across the entire codebase.
     """
-    usage_data = {}
-    
-    # Get all Python files in the project (excluding common_dir to avoid self-references)
-    try:
-        cmd = ['find', '.', '-name', '*.py', '-not', '-path', f'./{common_dir}/*']
-        result = subprocess.run(cmd, capture_output=True, text=True, check=True)
-        all_python_files = [line.strip() for line in result.stdout.split('\n') if line.strip()]
-        
-        # Look for imports that reference the common directory
-        for file_path in all_python_files:
-            if not os.path.exists(file_path):
+    return scan_repository([common_dir])[common_dir][1]
+
+def module_prefixes(common_dir):
+    """Dotted module names a common directory can appear as in import statements."""
+    return {common_dir.replace('/', '.'), common_dir.replace('\\', '.')}
+
+def filter_common_imports(imports, prefixes):
+    """Keep only the imports whose module references one of the common prefixes."""
+    return [imp for imp in imports if any(prefix in imp.get('module', '') for prefix in prefixes)]
+
+def walk_python_files(root='.'):
+    """Yield every Python file under root in a single directory walk."""
+    for dirpath, dirnames, filenames in os.walk(root):
+        dirnames[:] = [d for d in dirnames if d != '.git']
+        for filename in filenames:
+            if filename.endswith('.py'):
+                yield os.path.join(dirpath, filename)
+
+def _relative_to_root(common_dir, root):
+    """Express a common directory relative to root, so absolute paths match walked files."""
+    if os.path.isabs(common_dir):
+        return os.path.relpath(common_dir, os.path.abspath(root))
+    return os.path.normpath(common_dir)
+
+def scan_repository(common_dirs, root='.', include_usage=True):
+    """
+    Scan the repository once for several common directories.
+    Every Python file is walked and parsed a single time; the parsed imports are
+    then attributed to each common directory that contains the file or is imported
+    by it. Returns {common_dir: (common_files, usage_data)} in the same shape as
+    scan_common_directory and find_usage_across_codebase. With include_usage=False
+    only the common directories themselves are walked and usage_data stays empty.
+    """
+    results = {common_dir: ({}, {}) for common_dir in common_dirs}
+    relative_dirs = {common_dir: _relative_to_root(common_dir, root) for common_dir in common_dirs}
+    prefixes = {common_dir: module_prefixes(relative_dirs[common_dir]) for common_dir in common_dirs}
+
+    for common_dir in common_dirs:
+        if not os.path.exists(os.path.join(root, relative_dirs[common_dir])):
+            print(f"Warning: Common directory {common_dir} does not exist")
+
+    if include_usage:
+        python_files = walk_python_files(root)
+    else:
+        python_files = (file_path for common_dir in dict.fromkeys(relative_dirs.values())
+                        for file_path in walk_python_files(os.path.join(root, common_dir)))
+
+    for file_path in python_files:
+        relative_file = os.path.relpath(file_path, root)
+        imports = analyze_imports_in_file(file_path)
+        file_stat = None
+
+        for common_dir in common_dirs:
+            common_files, usage_data = results[common_dir]
+
+            if is_within_directory(relative_file, relative_dirs[common_dir]):
+                if file_stat is None:
+                    file_stat = os.stat(file_path)
+                relative_path = os.path.relpath(relative_file, relative_dirs[common_dir])
+                common_files[relative_path] = {
+                    'full_path': os.path.normpath(os.path.join(common_dir, relative_path)),
+                    'size_bytes': file_stat.st_size,
+                    'imports': imports,
+                    'last_modified': datetime.fromtimestamp(file_stat.st_mtime).isoformat()
+                }
+                # Files inside the common directory are not counted as usage of it
                 continue
-                
-            imports = analyze_imports_in_file(file_path)
-            common_imports = []
-            
-            for imp in imports:
-                # Check if import references common directory
-                module = imp.get('module', '')
-                if common_dir.replace('/', '.') in module or common_dir.replace('\\', '.') in module:
-                    common_imports.append(imp)
-            
+
+            if not include_usage:
+                continue
+            common_imports = filter_common_imports(imports, prefixes[common_dir])
             if common_imports:
                 usage_data[file_path] = {
                     'common_imports': common_imports,
                     'import_count': len(common_imports)
                 }
-    
-    except subprocess.CalledProcessError:
-        print("Warning: Could not scan codebase for usage patterns")
-    
-    return usage_data
+
+    return results
 
 def load_existing_tracking(tracking_file):
     """Load existing tracking data if it exists."""
     if os.path.exists(tracking_file):
         try:
             with open(tracking_file, 'r', encoding='utf-8') as f:
-                return yaml.safe_load(f) or {}
+                return _load_yaml(f) or {}
         except Exception as e:
             print(f"Warning: Could not load existing tracking file: {e}")
     return {}
@@ -150,21 +252,43 @@ def update_tracking_file(common_dir, tracking_file):
     """
     Update the tracking YAML file with current state of common code usage.
     """
-    print(f"Analyzing common directory: {common_dir}")
-    print(f"Updating tracking file: {tracking_file}")
-    
+    return update_tracking_files({common_dir: tracking_file})
+
+def update_tracking_files(tracking_targets):
+    """
+    Update tracking YAML files for several common directories in one pass.
+    tracking_targets maps each common directory to its tracking file. The repo
+    is walked and each file parsed once, no matter how many directories are tracked.
+    """
+    common_dirs = list(tracking_targets)
+    print(f"Analyzing common directories: {', '.join(common_dirs)}")
+
     # Get git information
     commit_hash, commit_author, commit_date = get_git_info()
-    
-    # Get changed files in common directory
-    changed_files = get_changed_files(common_dir)
-    
-    # Scan common directory structure
-    common_files = scan_common_directory(common_dir)
-    
-    # Find usage across codebase
-    usage_data = find_usage_across_codebase(common_dir)
-    
+
+    # Get changed files in all common directories
+    changed_by_dir = get_changed_files_by_dir(common_dirs)
+
+    # Scan common directories and usage across codebase in a single walk
+    scan_results = scan_repository(common_dirs)
+
+    success = True
+    for common_dir, tracking_file in tracking_targets.items():
+        common_files, usage_data = scan_results[common_dir]
+        success &= write_tracking_entry(
+            common_dir, tracking_file,
+            (commit_hash, commit_author, commit_date),
+            changed_by_dir[common_dir], common_files, usage_data
+        )
+    return success
+
+def write_tracking_entry(common_dir, tracking_file, git_info, changed_files, common_files, usage_data):
+    """
+    Append one analysis entry to a tracking YAML file.
+    """
+    print(f"Updating tracking file: {tracking_file}")
+    commit_hash, commit_author, commit_date = git_info
+
     # Load existing tracking data
     existing_data = load_existing_tracking(tracking_file)
     
@@ -207,35 +331,199 @@ def update_tracking_file(common_dir, tracking_file):
     }
     
     # Write updated tracking file
+    if not _write_tracking_yaml(tracking_file, existing_data):
+        return False
+    print(f"Successfully updated tracking file: {tracking_file}")
+    print(f"Found {len(common_files)} files in common directory")
+    print(f"Found {len(usage_data)} files using common code")
+    if changed_files:
+        print(f"Detected {len(changed_files)} changed files in common directory")
+    
+    return True
+
+def _write_tracking_yaml(tracking_file, data):
+    """Write tracking data to YAML, creating parent directories as needed."""
     try:
+        tracking_parent = os.path.dirname(tracking_file)
+        if tracking_parent:
+            os.makedirs(tracking_parent, exist_ok=True)
         with open(tracking_file, 'w', encoding='utf-8') as f:
-            yaml.dump(existing_data, f, default_flow_style=False, sort_keys=False, indent=2)
-        print(f"Successfully updated tracking file: {tracking_file}")
-        print(f"Found {len(common_files)} files in common directory")
-        print(f"Found {len(usage_data)} files using common code")
-        if changed_files:
-            print(f"Detected {len(changed_files)} changed files in common directory")
+            _dump_yaml(data, f)
     except Exception as e:
         print(f"Error writing tracking file: {e}")
         return False
-    
     return True
 
+def write_usage_history(common_dir, tracking_file, snapshots):
+    """
+    Store backfilled usage snapshots under usage_history in a tracking YAML file.
+    """
+    existing_data = load_existing_tracking(tracking_file)
+    existing_data['usage_history'] = snapshots
+    existing_data['usage_history_updated'] = datetime.now().isoformat()
+    existing_data['common_directory'] = common_dir
+
+    if not _write_tracking_yaml(tracking_file, existing_data):
+        return False
+    print(f"Wrote {len(snapshots)} historical snapshots to {tracking_file}")
+    return True
+
+def backfill_tracking_files(tracking_targets, commit_count, workers=None, cache_file=None):
+    """
+    Backfill usage history for the last commit_count commits from git objects.
+    """
+    git_backfill = _lazy_import(_sibling_module('git_backfill'))
+
+    history = git_backfill.backfill_usage_history(list(tracking_targets), commit_count,
+                                     workers=workers, cache_file=cache_file)
+    success = True
+    for common_dir, tracking_file in tracking_targets.items():
+        success &= write_usage_history(common_dir, tracking_file, history[common_dir])
+    return success
+
+def load_tracking_config(config_file):
+    """Load a tracking config file listing common directories to track."""
+    with open(config_file, 'r', encoding='utf-8') as f:
+        return _load_yaml(f) or {}
+
+def validate_tracking_config(config):
+    """
+    Check a loaded tracking config and normalize common_dirs to a list of patterns.
+    Returns (patterns, error); error is None when the config is usable.
+    """
+    if not isinstance(config, dict):
+        return None, "config must be a mapping with common_dirs and tracking_file"
+    patterns = config.get('common_dirs', [])
+    if isinstance(patterns, str):
+        patterns = [patterns]
+    if not isinstance(patterns, list) or not all(isinstance(p, str) for p in patterns):
+        return None, "common_dirs must be a string or a list of strings"
+    tracking_file = config.get('tracking_file')
+    if tracking_file is not None and not isinstance(tracking_file, str):
+        return None, "tracking_file must be a string"
+    return patterns, None
+
+def expand_common_dirs(patterns):
+    """Expand glob patterns from the config into existing directories."""
+    common_dirs = []
+    for pattern in patterns:
+        matches = sorted(path for path in _lazy_import('glob').glob(pattern) if os.path.isdir(path))
+        if not matches:
+            print(f"Warning: No common directories match {pattern}")
+        common_dirs.extend(matches)
+    return common_dirs
+
+def build_tracking_targets(common_dirs, tracking_file):
+    """
+    Map each common directory to its own tracking file.
+    {name} in tracking_file is replaced by the directory path with separators
+    turned into underscores. Tracking several directories without {name}
+    gets _{name} appended before the file extension. Raises ValueError when two
+    directories would share a tracking file (e.g. team/a_common and team_a/common).
+    """
+    if len(common_dirs) > 1 and '{name}' not in tracking_file:
+        stem, ext = os.path.splitext(tracking_file)
+        tracking_file = f"{stem}_{{name}}{ext}"
+
+    targets = {}
+    for common_dir in common_dirs:
+        name = common_dir.replace('/', '_').replace('\\', '_')
+        targets[common_dir] = tracking_file.replace('{name}', name)
+
+    seen = {}
+    for common_dir, target in targets.items():
+        if target in seen:
+            raise ValueError(f"{seen[target]} and {common_dir} would both write {target}")
+        seen[target] = common_dir
+    return targets
+
 def main():
     parser = argparse.ArgumentParser(description='Track common code usage and imports')
-    parser.add_argument('--common_dir', required=True, 
-                       help='Directory containing common code to track')
-    parser.add_argument('--tracking_file', required=True,
-                       help='YAML file to store tracking information')
+    parser.add_argument('--common_dir', nargs='+', default=[],
+                       help='One or more directories containing common code to track')
+    parser.add_argument('--config',
+                       help='YAML config listing common_dirs (globs allowed) and a tracking_file template')
+    parser.add_argument('--tracking_file',
+                       help='YAML file to store tracking information; use {name} for per-directory files')
+    parser.add_argument('--backfill', type=int, metavar='N',
+                       help='Backfill usage history for the last N commits from git objects')
+    parser.add_argument('--workers', type=int,
+                       help='Worker processes for --backfill (default: CPU count)')
+    parser.add_argument('--blob_cache',
+                       help='JSON file caching parse results by blob SHA across --backfill runs')
+    parser.add_argument('--watch', action='store_true',
+                       help='Keep the import index in memory and serve queries on a Unix socket')
+    parser.add_argument('--query', metavar='MODULE',
+                       help='Ask a running --watch server which files use MODULE')
+    parser.add_argument('--socket', default='.track_imports.sock',
+                       help='Unix socket path for --watch and --query')
+    parser.add_argument('--poll_interval', type=float, default=1.0,
+                       help='Seconds between change polls in --watch mode')
+    parser.add_argument('--profile_startup', '--profile-startup', action='store_true',
+                       help='Print import and total run time when the run finishes')
     
     args = parser.parse_args()
+    try:
+        return run_tracker(args, parser)
+    finally:
+        if args.profile_startup:
+            print_startup_profile()
+
+def run_tracker(args, parser):
+    """Run the mode selected on the command line and return the exit code."""
+    if args.query:
+        watch_server = _lazy_import(_sibling_module('watch_server'))
+        try:
+            response = watch_server.query_watch_server({'query': 'who_uses', 'module': args.query}, args.socket)
+        except (OSError, ValueError):
+            print(f"Error: no watch server on {args.socket}")
+            return 1
+        print(_lazy_import('json').dumps(response, indent=2))
+        return 0
     
     # Ensure we're in the right directory (where .git exists)
     if not os.path.exists('.git'):
         print("Error: This script must be run from the root of a git repository")
         return 1
-    
-    success = update_tracking_file(args.common_dir, args.tracking_file)
+
+    if args.watch:
+        watch_server = _lazy_import(_sibling_module('watch_server'))
+        return 0 if watch_server.run_watch_server(args.socket, args.poll_interval) else 1
+
+    common_dirs = list(args.common_dir)
+    tracking_file = args.tracking_file
+    if args.config:
+        if not os.path.exists(args.config):
+            print(f"Error: Config file {args.config} does not exist")
+            return 1
+        config = load_tracking_config(args.config)
+        patterns, error = validate_tracking_config(config)
+        if error:
+            print(f"Error: Invalid config file {args.config}: {error}")
+            return 1
+        common_dirs += expand_common_dirs(patterns)
+        tracking_file = tracking_file or config.get('tracking_file')
+
+    # Preserve order but drop duplicates from overlapping globs
+    common_dirs = list(dict.fromkeys(os.path.normpath(d) for d in common_dirs))
+    if not common_dirs:
+        parser.error('at least one --common_dir or a --config with common_dirs is required')
+    if not tracking_file:
+        parser.error('--tracking_file is required (or tracking_file in --config)')
+
+    if args.backfill is not None and args.backfill <= 0:
+        parser.error('--backfill must be a positive number of commits')
+    if args.workers is not None and args.workers <= 0:
+        parser.error('--workers must be positive')
+
+    try:
+        tracking_targets = build_tracking_targets(common_dirs, tracking_file)
+    except ValueError as e:
+        parser.error(f"tracking files collide: {e}")
+    if args.backfill:
+        success = backfill_tracking_files(tracking_targets, args.backfill, args.workers, args.blob_cache)
+    else:
+        success = update_tracking_files(tracking_targets)
     return 0 if success else 1
 
 if __name__ == "__main__":
@@ -0,0 +1,264 @@
+"""
+Watch mode for the common code tracker.
+Keeps the parsed import index in memory, re-parses only files whose mtime or
+size changed (found by stat polling), and answers "who uses this" queries
+over a local Unix socket so editors and scripts get answers without a full scan.
+
+Protocol: one JSON object per line in each direction, e.g.
+    {"query": "who_uses", "module": "sth.robert_common.utils"}
+    {"query": "usage", "common_dir": "sth/robert_common"}
+    {"query": "stats"}
+"""
+
+import json
+import os
+import signal
+import socket
+import socketserver
+import stat
+import threading
+import time
+
+if __package__:
+    from .track_imports import (
+        analyze_imports_in_file,
+        is_within_directory,
+        module_prefixes,
+        walk_python_files,
+    )
+else:
+    from track_imports import (
+        analyze_imports_in_file,
+        is_within_directory,
+        module_prefixes,
+        walk_python_files,
+    )
+
+DEFAULT_SOCKET = '.track_imports.sock'
+
+
+def _imported_names(imp):
+    """Names brought in by a from-import, with any "as alias" suffix dropped."""
+    return {item.split()[0] for item in imp.get('items', []) if item.split()}
+
+
+class ImportIndex:
+    """
+    In-memory import index for every Python file under root.
+    by_module maps each imported module to {file_path: [imports]} so queries
+    only touch the modules involved rather than every file in the repo.
+    """
+
+    def __init__(self, root='.'):
+        self.root = root
+        self.files = {}      # file_path -> ((mtime_ns, size), imports)
+        self.by_module = {}  # module -> {file_path: [imports]}
+        self.lock = threading.Lock()
+        self.last_refresh = None
+
+    def refresh(self):
+        """Stat every Python file and re-parse only the ones that changed."""
+        seen = set()
+        updates = {}
+        for file_path in walk_python_files(self.root):
+            seen.add(file_path)
+            try:
+                file_stat = os.stat(file_path)
+            except OSError:
+                continue
+            key = (file_stat.st_mtime_ns, file_stat.st_size)
+            current = self.files.get(file_path)
+            if current is None or current[0] != key:
+                updates[file_path] = (key, analyze_imports_in_file(file_path))
+
+        removed = set(self.files) - seen
+        if updates or removed:
+            with self.lock:
+                for file_path in removed:
+                    self._remove(file_path)
+                for file_path, entry in updates.items():
+                    self._remove(file_path)
+                    self._add(file_path, entry)
+        self.last_refresh = time.time()
+        return list(updates), sorted(removed)
+
+    def _add(self, file_path, entry):
+        self.files[file_path] = entry
+        by_file = {}
+        for imp in entry[1]:
+            by_file.setdefault(imp['module'], []).append(imp)
+        for module, imports in by_file.items():
+            self.by_module.setdefault(module, {})[file_path] = imports
+
+    def _remove(self, file_path):
+        entry = self.files.pop(file_path, None)
+        if entry is None:
+            return
+        for module in {imp['module'] for imp in entry[1]}:
+            users = self.by_module.get(module)
+            if users is not None:
+                users.pop(file_path, None)
+                if not users:
+                    del self.by_module[module]
+
+    def who_uses(self, module):
+        """
+        Files importing module, a submodule of it, or importing it by name
+        from its parent package (from pkg import module).
+        """
+        parent, _, name = module.rpartition('.')
+        result = {}
+        with self.lock:
+            for imported, users in self.by_module.items():
+                direct = imported == module or imported.startswith(module + '.')
+                if not direct and imported != parent:
+                    continue
+                for file_path, imports in users.items():
+                    matches = imports if direct else [
+                        imp for imp in imports if name in _imported_names(imp)
+                    ]
+                    if matches:
+                        result.setdefault(file_path, []).extend(matches)
+        return result
+
+    def usage(self, common_dir):
+        """Usage of a common directory in the same shape as find_usage_across_codebase."""
+        prefixes = module_prefixes(common_dir)
+        usage_data = {}
+        with self.lock:
+            for module, users in self.by_module.items():
+                if not any(prefix in module for prefix in prefixes):
+                    continue
+                for file_path, imports in users.items():
+                    if is_within_directory(os.path.relpath(file_path, self.root), common_dir):
+                        continue
+                    usage_data.setdefault(file_path, []).extend(imports)
+        return {
+            file_path: {'common_imports': imports, 'import_count': len(imports)}
+            for file_path, imports in usage_data.items()
+        }
+
+    def stats(self):
+        with self.lock:
+            return {
+                'indexed_files': len(self.files),
+                'indexed_modules': len(self.by_module),
+                'last_refresh': self.last_refresh
+            }
+
+
+class _QueryHandler(socketserver.StreamRequestHandler):
+    def handle(self):
+        for line in self.rfile:
+            if not line.strip():
+                continue
+            try:
+                response = handle_query(self.server.index, json.loads(line))
+            except Exception as e:
+                response = {'error': str(e)}
+            self.wfile.write(json.dumps(response).encode() + b'\n')
+            self.wfile.flush()
+
+
+class ImportQueryServer(socketserver.ThreadingMixIn, socketserver.UnixStreamServer):
+    daemon_threads = True
+
+    def __init__(self, socket_path, index):
+        self.index = index
+        super().__init__(socket_path, _QueryHandler)
+
+
+# Field each query needs in the request
+QUERY_FIELDS = {'who_uses': 'module', 'usage': 'common_dir'}
+
+
+def _claim_socket_path(socket_path):
+    """
+    Make socket_path free for a new server. Only a stale socket (one nobody
+    accepts connections on) is removed; anything else is reported and kept.
+    """
+    if not os.path.lexists(socket_path):
+        return True
+    if not stat.S_ISSOCK(os.lstat(socket_path).st_mode):
+        print(f"Error: {socket_path} exists and is not a socket")
+        return False
+    with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as probe:
+        try:
+            probe.connect(socket_path)
+        except ConnectionRefusedError:
+            os.unlink(socket_path)
+            return True
+        except OSError as e:
+            print(f"Error: Could not check socket {socket_path}: {e}")
+            return False
+    print(f"Error: A watch server is already running on {socket_path}")
+    return False
+
+
+def handle_query(index, request):
+    """Dispatch one decoded query to the index."""
+    query = request.get('query')
+    required = QUERY_FIELDS.get(query)
+    if required and not isinstance(request.get(required), str):
+        return {'error': f"{query} requires '{required}'"}
+
+    start = time.perf_counter()
+    if query == 'who_uses':
+        result = index.who_uses(request['module'])
+    elif query == 'usage':
+        result = index.usage(request['common_dir'])
+    elif query == 'stats':
+        result = index.stats()
+    else:
+        return {'error': f"Unknown query: {query}"}
+    return {'result': result, 'elapsed_ms': (time.perf_counter() - start) * 1000}
+
+
+def run_watch_server(socket_path=DEFAULT_SOCKET, poll_interval=1.0, root='.'):
+    """
+    Build the index, then serve queries while polling for changed files until interrupted.
+    """
+    if not _claim_socket_path(socket_path):
+        return False
+
+    index = ImportIndex(root)
+    start = time.perf_counter()
+    changed, _ = index.refresh()
+    print(f"Indexed {len(changed)} files in {time.perf_counter() - start:.2f}s")
+
+    server = ImportQueryServer(socket_path, index)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    print(f"Serving import queries on {socket_path} (polling every {poll_interval}s)")
+
+    # Stop cleanly on SIGTERM too, so supervisors do not leave a stale socket behind
+    stop = threading.Event()
+    signal.signal(signal.SIGTERM, lambda signum, frame: stop.set())
+
+    try:
+        while not stop.wait(poll_interval):
+            changed, removed = index.refresh()
+            if changed or removed:
+                print(f"Re-indexed {len(changed)} changed and dropped {len(removed)} removed files")
+    except KeyboardInterrupt:
+        pass
+    finally:
+        print("Stopping watch server")
+        server.shutdown()
+        server.server_close()
+        if os.path.exists(socket_path):
+            os.unlink(socket_path)
+    return True
+
+
+def query_watch_server(request, socket_path=DEFAULT_SOCKET):
+    """Send one query to a running watch server and return the decoded response."""
+    with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as client:
+        client.connect(socket_path)
+        client.sendall(json.dumps(request).encode() + b'\n')
+        response = b''
+        while not response.endswith(b'\n'):
+            chunk = client.recv(65536)
+            if not chunk:
+                break
+            response += chunk
+    return json.loads(response)
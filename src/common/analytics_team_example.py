@@ -3,6 +3,9 @@ Example of how the analytics team uses Robert's team extensions.
 This shows another team finding value in your sth/robert_common code.
 """
 
+import hashlib
+import json
+
 from sth.robert_common.extended_utils import EnhancedLogger, create_team_database_connection
 from sth.robert_common.advanced_processing import AdvancedDataProcessor, data_export_helper
 
@@ -53,6 +56,124 @@ class AnalyticsReporter:
         
         return report_json
 
+class IncrementalAnalyticsReporter(AnalyticsReporter):
+    """
+    Analytics reporter for dashboards that regenerate the report frequently.
+    Keeps running aggregates and only reprocesses teams whose input changed,
+    detected by a content hash of each team's data.
+    """
+    
+    REPORT_MODES = ("full", "delta")
+    
+    def __init__(self):
+        super().__init__()
+        self.team_entries = {}   # team -> {'hash': ..., 'entry': ...}
+        self.quality_total = 0.0
+        self.team_order = []
+        self.cached_report = None
+        # Changes not yet returned by a delta report, and the teams the last delta reported
+        self.pending_changes = {}
+        self.pending_removals = set()
+        self.delta_teams = set()
+        
+    @staticmethod
+    def _content_hash(data):
+        """Stable hash of a team's input data."""
+        return hashlib.sha256(json.dumps(data, sort_keys=True, default=str).encode()).hexdigest()
+    
+    def _refresh_aggregates(self):
+        """Recompute the quality total from current entries so float error cannot accumulate."""
+        self.quality_total = sum(cached['entry']['quality_score'] for cached in self.team_entries.values())
+        self.cached_report = None
+        
+    def average_quality(self):
+        """Average quality across current teams, from the running aggregate."""
+        if not self.team_entries:
+            return 0.0
+        return self.quality_total / len(self.team_entries)
+        
+    def generate_team_report(self, team_data, mode="full"):
+        """
+        Generate the analytics report, reprocessing only changed teams.
+        mode="full" returns the full document, rebuilt only after something changed.
+        mode="delta" returns compact JSON with the teams changed or removed since the
+        previous delta report (since creation for the first one); full reports do not
+        reset it. If any team fails validation nothing is stored, so the next call
+        retries every pending change.
+        """
+        if mode not in self.REPORT_MODES:
+            raise ValueError(f"Unknown report mode: {mode} (expected one of {', '.join(self.REPORT_MODES)})")
+        
+        # Process every changed team before storing anything
+        updates = {}
+        for team_name, data in team_data.items():
+            content_hash = self._content_hash(data)
+            cached = self.team_entries.get(team_name)
+            if cached and cached['hash'] == content_hash:
+                continue
+            
+            self.logger.info_with_context(
+                f"Processing data for {team_name}",
+                team=team_name,
+                metrics_count=len(data)
+            )
+            result = self.processor.process_with_validation(data)
+            updates[team_name] = {
+                'hash': content_hash,
+                'entry': {
+                    'team': team_name,
+                    'processed_data': result,
+                    'quality_score': result['data_quality_score']
+                }
+            }
+        removed = [t for t in self.team_entries if t not in team_data]
+        
+        for team_name in removed:
+            del self.team_entries[team_name]
+            self.pending_changes.pop(team_name, None)
+            if team_name in self.delta_teams:
+                self.pending_removals.add(team_name)
+        for team_name, update in updates.items():
+            self.team_entries[team_name] = update
+            self.pending_changes[team_name] = update['entry']
+            self.pending_removals.discard(team_name)
+        if updates or removed:
+            self._refresh_aggregates()
+        
+        if list(team_data) != self.team_order:
+            self.team_order = list(team_data)
+            self.cached_report = None
+        
+        self.logger.info_with_context(
+            "Incremental analytics report completed",
+            teams_reprocessed=len(updates),
+            teams_removed=len(removed),
+            average_quality=self.average_quality()
+        )
+        
+        if mode == "delta":
+            delta = json.dumps({
+                'report_type': 'team_analytics_delta',
+                'teams_changed': list(self.pending_changes.values()),
+                'teams_removed': sorted(self.pending_removals),
+                'teams_total': len(self.team_entries),
+                'average_quality': self.average_quality()
+            }, separators=(',', ':'), default=str)
+            self.pending_changes = {}
+            self.pending_removals = set()
+            self.delta_teams = set(self.team_entries)
+            return delta
+        
+        # The indented full document is only serialized when it is asked for
+        if self.cached_report is None:
+            self.cached_report = data_export_helper({
+                'report_type': 'team_analytics',
+                'generated_by': 'analytics_team',
+                'using_extensions_from': 'robert_team',
+                'teams_analyzed': [self.team_entries[t]['entry'] for t in team_data]
+            })
+        return self.cached_report
+
 def main():
     """Example analytics workflow using Robert team's code."""
     reporter = AnalyticsReporter()